@@ -1,17 +1,55 @@
-from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from fastapi.security.api_key import APIKeyHeader
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import FileResponse, HTMLResponse, Response
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.staticfiles import NotModifiedResponse
+from pydantic import BaseModel, ConfigDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Awaitable, List, Optional
+from httpx_aiohttp import AiohttpTransport
+import aiohttp
+import asyncio
+import gzip
+import hashlib
 import httpx
+import mimetypes
+import msgspec
 import os
+import string
+import tempfile
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Simli Face Selection API")
+# Upper bound on a single upstream Simli call, on top of the per-stage timeouts
+UPSTREAM_TIMEOUT = 10  # seconds
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for all upstream Simli calls, so connections are reused.
+    # The httpx API is kept, but requests go out over aiohttp's faster connector.
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=30),
+    )
+    # AiohttpTransport turns these into a per-request aiohttp ClientTimeout, which
+    # replaces any session-level one: connect -> sock_connect, read -> sock_read and
+    # pool -> connect. aiohttp's connect covers both waiting for a pooled connection
+    # and opening a new one, so pool must be at least connect. write is not used.
+    app.state.http = httpx.AsyncClient(
+        transport=AiohttpTransport(client=session),
+        timeout=httpx.Timeout(connect=2.0, read=8.0, write=None, pool=3.0),
+    )
+    yield
+    await app.state.http.aclose()
+
+app = FastAPI(title="Simli Face Selection API", lifespan=lifespan)
+# Compress API responses; the index page is served pre-compressed (see below)
+GZIP_MIN_SIZE = 1024  # bytes
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=6)
 
 # Get API keys from environment variables
 SIMLI_API_KEY = os.getenv("SIMLI_API_KEY")
@@ -25,8 +63,21 @@ if not TTS_API_KEY:
     print("Warning: TTS_API_KEY not found in environment variables. Using default value for testing.")
     TTS_API_KEY = "YOUR_TTS_API_KEY_HERE"  # Replace with your actual TTS API key for testing
 
-# Model for our face options
-class FaceOption(BaseModel):
+# Upstream Simli endpoints and headers, built once instead of per request
+_FACES_URL = httpx.URL("https://api.simli.ai/getFaceIDs", params={"getPublic": "false"})
+_AGENTS_URL = httpx.URL("https://api.simli.ai/agents")
+_SESSION_TOKEN_URL = httpx.URL("https://api.simli.ai/createE2ESessionToken")
+_FACES_HEADERS = httpx.Headers({"api-key": SIMLI_API_KEY, "accept": "application/json"})
+_AGENTS_HEADERS = httpx.Headers({"x-simli-api-key": SIMLI_API_KEY, "accept": "application/json"})
+_SESSION_TOKEN_HEADERS = httpx.Headers({"content-type": "application/json", "accept": "application/json"})
+
+# Shared model config: drop unknown fields and never copy or re-validate
+# model instances that are already validated
+_MODEL_CONFIG = ConfigDict(extra="ignore", validate_default=False, revalidate_instances="never")
+
+# Model for our face options. Response-only models are msgspec Structs, which
+# decode and encode JSON much faster than Pydantic models
+class FaceOption(msgspec.Struct, gc=False):
     id: str
     name: str
     previewImage: str
@@ -35,6 +86,7 @@ class FaceOption(BaseModel):
 
 # Pydantic models for agent creation
 class AgentCreate(BaseModel):
+    model_config = _MODEL_CONFIG
     face_id: str
     name: str
     first_message: Optional[str] = "The first message you want the agent to say"
@@ -48,757 +100,237 @@ class AgentCreate(BaseModel):
     max_session_length: Optional[int] = 3600
 
 class UpdateWidget(BaseModel):
+    model_config = _MODEL_CONFIG
     simliWidget:str
 
 class AgentResponse(BaseModel):
+    model_config = _MODEL_CONFIG
     id: str
     face_id: str
     name: str
 
 # Model for agents returned from the API (simplified for dropdown)
-class Agent(BaseModel):
+class Agent(msgspec.Struct, gc=False):
     id: str
     name: str
     previewImage:str
 
 # Session token request model
 class SessionTokenRequest(BaseModel):
+    model_config = _MODEL_CONFIG
     simliAPIKey: str
     ttsAPIKey: str
 
 # Session token response model
 class SessionTokenResponse(BaseModel):
+    model_config = _MODEL_CONFIG
     session_token: str
 
+# Built once and reused for every response
+# strict=False accepts the same lax input Pydantic did, e.g. "createdAt": "1700000000"
+_FACES_DECODER = msgspec.json.Decoder(List[FaceOption], strict=False)
+_JSON_ENCODER = msgspec.json.Encoder()
+
+def _list_schema(struct: type) -> dict:
+    """
+    OpenAPI response schema for a JSON array of msgspec structs
+    """
+    _, components = msgspec.json.schema_components([struct])
+    return {"content": {"application/json": {"schema": {"type": "array", "items": components[struct.__name__]}}}}
+
+async def _upstream(call: Awaitable[httpx.Response]) -> httpx.Response:
+    """
+    Await an upstream Simli request, turning any timeout into a 504
+    """
+    try:
+        return await asyncio.wait_for(call, UPSTREAM_TIMEOUT)
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        raise HTTPException(status_code=504, detail="Timed out waiting for the Simli API")
+
+# Face lists change rarely, so upstream responses are kept for a short while,
+# together with the final JSON bytes of each encoding. Every variant is stored as
+# (body, headers, headers for a 304) and has its own ETag.
+FACES_CACHE_TTL = 60  # seconds
+_faces_cache = {"ts": 0.0, "faces": None, "identity": None, "gzip": None}
+# Refresh currently in progress, shared by every request that misses the cache
+_faces_inflight: Optional[asyncio.Task] = None
+
+async def _fetch_faces(client: httpx.AsyncClient) -> dict:
+    """
+    Fetch face IDs from the Simli API, reusing the cached response while it is fresh
+    """
+    global _faces_inflight
+    if _faces_cache["faces"] is not None and time.monotonic() - _faces_cache["ts"] < FACES_CACHE_TTL:
+        return _faces_cache
+
+    if _faces_inflight is None:
+        _faces_inflight = asyncio.create_task(_refresh_faces(client))
+        _faces_inflight.add_done_callback(_clear_faces_inflight)
+    # Shielded so one cancelled request does not abort the refresh for the others
+    return await asyncio.shield(_faces_inflight)
+
+def _clear_faces_inflight(task: asyncio.Task):
+    global _faces_inflight
+    if _faces_inflight is task:
+        _faces_inflight = None
+
+async def _refresh_faces(client: httpx.AsyncClient) -> dict:
+    response = await _upstream(client.get(_FACES_URL, headers=_FACES_HEADERS))
+    
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, 
+                            detail=f"Error fetching faces from Simli API: {response.text}")
+    
+    # Validated and serialized once per refresh, not once per request
+    try:
+        faces = _FACES_DECODER.decode(response.content)
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=502, detail=f"Unexpected response from Simli API: {e}")
+    content = _JSON_ENCODER.encode(faces)
+    digest = hashlib.blake2b(content, digest_size=8).hexdigest()
+    etag, gz_etag = '"%s"' % digest, '"%s-gz"' % digest
+    # Bodies below GZIP_MIN_SIZE are never compressed, matching GZipMiddleware,
+    # which adds the Vary header itself to the larger uncompressed ones
+    if len(content) >= GZIP_MIN_SIZE:
+        vary = {"Vary": "Accept-Encoding"}
+        gz = (gzip.compress(content, 6), {"ETag": gz_etag, "Content-Encoding": "gzip", **vary},
+              {"ETag": gz_etag, **vary})
+    else:
+        vary, gz = {}, None
+    _faces_cache.update(
+        ts=time.monotonic(),
+        faces=faces,
+        identity=(content, {"ETag": etag}, {"ETag": etag, **vary}),
+        gzip=gz,
+    )
+    return _faces_cache
+
 # API routes
-@app.get("/api/faces", response_model=List[FaceOption])
-async def get_faces():
+@app.get("/api/faces", response_class=Response, responses={200: _list_schema(FaceOption)})
+async def get_faces(request: Request):
     """
     Fetch face IDs from the Simli API
     """
-    async with httpx.AsyncClient() as client:
-        headers = {"api-key": SIMLI_API_KEY}
-        response = await client.get("https://api.simli.ai/getFaceIDs?getPublic=false", headers=headers)
-        
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, 
-                                detail=f"Error fetching faces from Simli API: {response.text}")
-        
-        return response.json()
+    cache = await _fetch_faces(request.app.state.http)
+    # A gzip body is already compressed, so GZipMiddleware passes it through untouched
+    if cache["gzip"] and "gzip" in request.headers.get("accept-encoding", ""):
+        content, headers, not_modified_headers = cache["gzip"]
+    else:
+        content, headers, not_modified_headers = cache["identity"]
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=not_modified_headers)
+    return Response(content=content, media_type="application/json", headers=headers)
 @app.get("/test")
 async def testCode ():
     return HTMLResponse(open("test.html").read())
 
-@app.get("/api/agents", response_model=List[Agent])
-async def get_agents():
+@app.get("/api/agents", response_class=Response, responses={200: _list_schema(Agent)})
+async def get_agents(request: Request):
     """
     Fetch agent IDs from the Simli API
     """
-    async with httpx.AsyncClient() as client:
-        headers = {"x-simli-api-key": SIMLI_API_KEY}
-        response = await client.get("https://api.simli.ai/agents", headers=headers)
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, 
-                                detail=f"Error fetching agents from Simli API: {response.text}")
-        agents_data = response.json()
-        # Only include id and name for the dropdown
-        faces = {face["id"]:face for face in await get_faces()}
-        agents = [{"id": agent["id"], "name": agent.get("name", "Unnamed Agent"), "previewImage":faces[agent["face_id"]]["previewImage"]} for agent in agents_data]
-        return agents
-
-
-
-@app.post("/api/createE2ESessionToken", response_model=SessionTokenResponse)
-async def create_e2e_session_token(request: SessionTokenRequest):
+    client = request.app.state.http
+    response = await _upstream(client.get(_AGENTS_URL, headers=_AGENTS_HEADERS))
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, 
+                            detail=f"Error fetching agents from Simli API: {response.text}")
+    agents_data = response.json()
+    # Only include id and name for the dropdown
+    faces = {face.id:face for face in (await _fetch_faces(client))["faces"]}
+    agents = [Agent(id=agent["id"], name=agent.get("name", "Unnamed Agent"), previewImage=faces[agent["face_id"]].previewImage) for agent in agents_data]
+    return Response(content=_JSON_ENCODER.encode(agents), media_type="application/json")
+
+
+
+# The request body is forwarded to Simli as raw bytes, which validates it itself;
+# SessionTokenRequest only documents it
+@app.post("/api/createE2ESessionToken", responses={200: {"model": SessionTokenResponse}},
+          openapi_extra={"requestBody": {"required": True, "content": {
+              "application/json": {"schema": SessionTokenRequest.model_json_schema()}}}})
+async def create_e2e_session_token(request: Request):
     """
     Create a new end-to-end session token
     """
-    # In a real implementation, you would forward this to the endpoint
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.simli.ai/createE2ESessionToken",
-            json={
-                "simliAPIKey": request.simliAPIKey,
-                "ttsAPIKey": request.ttsAPIKey
-            }
+    client = request.app.state.http
+    response = await _upstream(client.post(
+        _SESSION_TOKEN_URL,
+        content=await request.body(),
+        headers=_SESSION_TOKEN_HEADERS,
+    ))
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code, 
+            detail=f"Error creating session token: {response.text}"
         )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code, 
-                detail=f"Error creating session token: {response.text}"
-            )
-        
-        return response.json()
+    
+    # Forward the upstream body untouched rather than decoding and re-encoding it
+    return Response(content=response.content, status_code=response.status_code,
+                    media_type=response.headers.get("content-type", "application/json"))
 @app.post("/api/updateTest")
 async def updateTestPage(widgetText:UpdateWidget):
     with open("test.html", "w") as file:
         file.write(f"<!DOCTYPE html>\n<body>{widgetText.simliWidget}\n</body>")
 
-# Serve HTML for frontend
-@app.get("/", response_class=HTMLResponse)
-async def get_html():
-    return """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Simli Face Selection</title>
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                max-width: 1200px;
-                margin: 0 auto;
-                padding: 20px;
-                background-color: #f9f9f9;
-            }
-            h1, h2, h3 {
-                color: #333;
-                text-align: center;
-            }
-            .container {
-                display: flex;
-                flex-direction: column;
-                gap: 20px;
-            }
-            .two-column {
-                display: flex;
-                gap: 20px;
-            }
-            .left-column, .right-column {
-                flex: 1;
-            }
-            .selection-container, .form-container, .session-container, .embed-container {
-                background-color: white;
-                border-radius: 8px;
-                padding: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                margin-bottom: 20px;
-            }
-            .form-group {
-                margin-bottom: 15px;
-            }
-            label {
-                display: block;
-                margin-bottom: 5px;
-                font-weight: bold;
-            }
-            input, select, textarea {
-                width: 100%;
-                padding: 10px;
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                font-size: 14px;
-            }
-            textarea {
-                min-height: 80px;
-                resize: vertical;
-            }
-            .required-field::after {
-                content: " *";
-                color: #c62828;
-            }
-            .submit-button {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 12px 20px;
-                border-radius: 4px;
-                cursor: pointer;
-                font-size: 16px;
-                margin-top: 15px;
-            }
-            .success-container {
-                background-color: #e8f5e9;
-                border-left: 4px solid #4CAF50;
-                padding: 15px;
-                margin-top: 20px;
-                border-radius: 4px;
-            }
-            .agent-details, .token-details {
-                margin-top: 10px;
-                background-color: #f5f5f5;
-                padding: 15px;
-                border-radius: 4px;
-                font-family: monospace;
-            }
-            .agent-id, .token-value {
-                font-weight: bold;
-                color: #2e7d32;
-                word-break: break-all;
-            }
-            .copy-button {
-                background-color: #2196F3;
-                color: white;
-                border: none;
-                padding: 5px 10px;
-                border-radius: 4px;
-                cursor: pointer;
-                font-size: 12px;
-                margin-left: 10px;
-            }
-            .copy-button:hover {
-                background-color: #0b7dda;
-            }
-            select {
-                width: 100%;
-                padding: 12px;
-                margin-bottom: 20px;
-                border-radius: 4px;
-                border: 1px solid #ddd;
-                font-size: 16px;
-            }
-            .faces-grid {
-                display: flex;
-                justify-content: center;
-                margin-top: 20px;
-                flex-wrap: wrap;
-                gap: 20px;
-            }
-            .face-card {
-                width: 300px;
-                border: 1px solid #eee;
-                border-radius: 8px;
-                overflow: hidden;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-                transition: transform 0.2s, box-shadow 0.2s;
-                cursor: pointer;
-            }
-            .face-card:hover {
-                transform: translateY(-5px);
-                box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-            }
-            .face-card.selected {
-                border: 3px solid #4CAF50;
-            }
-            .face-image {
-                width: 100%;
-                height: 200px;
-                object-fit: cover;
-            }
-            .face-info {
-                padding: 15px;
-            }
-            .face-name {
-                font-weight: bold;
-                font-size: 18px;
-                margin-bottom: 5px;
-            }
-            .face-id {
-                color: #777;
-                font-size: 12px;
-                word-break: break-all;
-            }
-            .loading {
-                text-align: center;
-                padding: 40px;
-                font-size: 18px;
-                color: #666;
-            }
-            .error {
-                background-color: #ffebee;
-                color: #c62828;
-                padding: 15px;
-                border-radius: 4px;
-                margin-bottom: 20px;
-                text-align: center;
-            }
-            .video-container {
-                margin-top: 30px;
-                background-color: white;
-                border-radius: 8px;
-                padding: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }
-            video {
-                max-width: 100%;
-                border-radius: 4px;
-            }
-        </style>
-    </head>
-    <body>
-        <h1>Simli Face Selection</h1>
-        
-        <div class="container">
-            <div id="error" class="error" style="display: none;"></div>
-            
-            <div class="two-column">
-                <div class="left-column">
-                    <div class="form-container">
-                        <h2>Create Agent</h2>
-                        <form id="agentForm">
-                            <input type="hidden" id="face_id" name="face_id" value="">
-                            
-                            <div class="form-group">
-                                <label for="name" class="required-field">Name</label>
-                                <input type="text" id="name" name="name" value="Untitled Agent" required>
-                            </div>
-                            
-                            <div class="form-group">
-                                <label for="first_message">First Message</label>
-                                <textarea id="first_message" name="first_message">The first message you want the agent to say</textarea>
-                            </div>
-                            
-                            <div class="form-group">
-                                <label for="prompt">Prompt</label>
-                                <textarea id="prompt" name="prompt">The persona of the agent and the context of the conversation</textarea>
-                            </div>
-                            
-                            <div class="form-group">
-                                <label for="voice_provider">Voice Provider</label>
-                                <select id="voice_provider" name="voice_provider">
-                                    <option value="elevenlabs">Elevenlabs</option>
-                                    <option value="cartesia">Cartesia</option>
-                                </select>
-                            </div>
-                            
-                            <div class="form-group">
-                                <label for="voice_id">Voice ID</label>
-                                <input type="text" id="voice_id" name="voice_id">
-                            </div>
-                            
-                            <div class="form-group">
-                                <label for="voice_model">Voice Model</label>
-                                <input type="text" id="voice_model" name="voice_model" placeholder="e.g., sonic-english">
-                            </div>
-                            
-                            <div class="form-group">
-                                <label for="language">Language</label>
-                                <input type="text" id="language" name="language">
-                            </div>
-                            
-                            <div class="form-group">
-                                <label for="max_idle_time">Max Idle Time (seconds)</label>
-                                <input type="number" id="max_idle_time" name="max_idle_time" value="300">
-                            </div>
-                            
-                            <div class="form-group">
-                                <label for="max_session_length">Max Session Length (seconds)</label>
-                                <input type="number" id="max_session_length" name="max_session_length" value="3600">
-                            </div>
-                            
-                            <button type="submit" class="submit-button">Create Agent</button>
-                        </form>
-                        
-                        <div id="successContainer" class="success-container" style="display: none;">
-                            <h3>Agent Created Successfully!</h3>
-                            <p>Your agent has been created with the following details:</p>
-                            <div id="agentDetails" class="agent-details">
-                                <div>Name: <span id="createdAgentName"></span></div>
-                                <div>Face ID: <span id="createdAgentFaceId"></span></div>
-                                <div>Agent ID: <span id="createdAgentId" class="agent-id"></span> 
-                                    <button onclick="copyAgentId()" class="copy-button">Copy ID</button>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="right-column">
-                    <div class="selection-container">
-                        <h2>Select a Face</h2>
-                        <select id="faceSelect" onchange="updateSelectedFace()">
-                            <option value="">Select a face...</option>
-                        </select>
-                        
-                        <div id="loading" class="loading">Loading faces...</div>
-                        <div id="facesGrid" class="faces-grid"></div>
-                    </div>
-                </div>
-            </div>
-            
-            <div id="videoPreview" class="video-container" style="display: none;">
-                <h2>Video Preview</h2>
-                <video id="videoPlayer" controls autoplay loop muted></video>
-            </div>
-            
-            <!-- New session token section -->
-            <div class="session-container">
-                <h2>Create E2E Session Token</h2>
-                <form id="sessionTokenForm">
-                    <div class="form-group">
-                        <label for="simliAPIKey">Simli API Key</label>
-                        <input type="text" id="simliAPIKey" name="simliAPIKey" value="SIMLI_API_KEY">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="ttsAPIKey">TTS API Key</label>
-                        <input type="text" id="ttsAPIKey" name="ttsAPIKey" value="TTS_API_KEY">
-                    </div>
-                    
-                    <button type="submit" class="submit-button">Create Session Token</button>
-                </form>
-                
-                <div id="tokenSuccessContainer" class="success-container" style="display: none;">
-                    <h3>Session Token Created Successfully!</h3>
-                    <div id="tokenDetails" class="token-details">
-                        <div>Token: <span id="createdToken" class="token-value"></span> 
-                            <button onclick="copyToken()" class="copy-button">Copy Token</button>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- New Embed Code Generator Section -->
-            <div class="embed-container">
-                <h2>Embed Code Generator</h2>
-                <div class="form-group">
-                    <label for="agentSelect">Select Agent</label>
-                    <select id="agentSelect">
-                        <option value="" onclick="loadAgents()">Select an agent...</option>
-                    </select>
-                </div>
-                <button onclick="generateEmbedCode()" class="submit-button">Generate Embed Code</button>
-                <div id="embedCodeContainer" class="success-container" style="display: none;">
-                    <h3>Embed Code</h3>
-                    <textarea id="embedCode" readonly style="width:100%; height:120px;"></textarea>
-                    <button onclick="copyEmbedCode()" class="copy-button">Copy Embed Code</button>
-                    <button onclick="updateTestPage()" class="copy-button">Update Test Page</button>
-                </div>
-                <button onclick="window.location.href  = '/test';" class="submit-button">Go To test</button>
-            </div>
-            
-        </div>
-
-        <script>
-            // Global variables
-            let faces = [];
-            let selectedFaceId = '';
-            
-            // API endpoints
-            const CREATE_AGENT_ENDPOINT = "https://api.simli.ai/agent";
-            
-            // DOM Elements
-            const faceSelect = document.getElementById('faceSelect');
-            const facesGrid = document.getElementById('facesGrid');
-            const loadingElement = document.getElementById('loading');
-            const errorElement = document.getElementById('error');
-            const videoPreview = document.getElementById('videoPreview');
-            const videoPlayer = document.getElementById('videoPlayer');
-            const agentForm = document.getElementById('agentForm');
-            const faceIdInput = document.getElementById('face_id');
-            const successContainer = document.getElementById('successContainer');
-            const createdAgentName = document.getElementById('createdAgentName');
-            const createdAgentFaceId = document.getElementById('createdAgentFaceId');
-            const createdAgentId = document.getElementById('createdAgentId');
-            
-            // Session token elements
-            const sessionTokenForm = document.getElementById('sessionTokenForm');
-            const tokenSuccessContainer = document.getElementById('tokenSuccessContainer');
-            const createdToken = document.getElementById('createdToken');
-            
-            // Load faces and agents on page load
-            document.addEventListener('DOMContentLoaded', () => {
-                loadFaces();
-                loadAgents();
-            });
-            
-            // Add form submission handlers
-            agentForm.addEventListener('submit', submitAgentForm);
-            sessionTokenForm.addEventListener('submit', submitSessionTokenForm);
-            
-            // Functions to interact with the API
-            async function loadFaces() {
-                try {
-                    showLoading(true);
-                    const response = await fetch('/api/faces');
-                    
-                    if (!response.ok) {
-                        throw new Error(`API error: ${response.status} ${response.statusText}`);
-                    }
-                    
-                    faces = await response.json();
-                    
-                    if (!faces || faces.length === 0) {
-                        showError('No faces available. Please check your API key and try again.');
-                        return;
-                    }
-                    
-                    // Populate dropdown and face cards
-                    populateFaceOptions(faces);
-                    createFaceCards(faces);
-                    
-                    showLoading(false);
-                } catch (error) {
-                    console.error('Error loading faces:', error);
-                    showError(`Failed to load faces: ${error.message}`);
-                    showLoading(false);
-                }
-            }
-            
-            function populateFaceOptions(faces) {
-                // Clear existing options
-                faceSelect.innerHTML = '<option value="">Select a face...</option>';
-                
-                // Add new options
-                faces.forEach(face => {
-                    const option = document.createElement('option');
-                    option.value = face.id;
-                    option.textContent = face.name;
-                    faceSelect.appendChild(option);
-                });
-            }
-            
-            function createFaceCards(faces) {
-                facesGrid.innerHTML = '';
-                
-                faces.forEach(face => {
-                    const card = document.createElement('div');
-                    card.className = 'face-card';
-                    card.dataset.id = face.id;
-                    card.onclick = () => selectFace(face.id);
-                    
-                    card.innerHTML = `
-                        <img src="${face.previewImage}" alt="${face.name}" class="face-image">
-                        <div class="face-info">
-                            <div class="face-id">${face.id}</div>
-                        </div>
-                    `;
-                    
-                    facesGrid.appendChild(card);
-                });
-            }
-            
-            function selectFace(faceId) {
-                selectedFaceId = faceId;
-                
-                // Update dropdown
-                faceSelect.value = faceId;
-                
-                // Update hidden form field
-                faceIdInput.value = faceId;
-                
-                // Update card selection
-                document.querySelectorAll('.face-card').forEach(card => {
-                    if (card.dataset.id === faceId) {
-                        card.classList.add('selected');
-                    } else {
-                        card.classList.remove('selected');
-                    }
-                });
-                
-                // Find the selected face
-                const selectedFace = faces.find(face => face.id === faceId);
-                
-                // Update video preview
-                if (selectedFace && selectedFace.previewVideo) {
-                    videoPlayer.src = selectedFace.previewVideo;
-                    videoPreview.style.display = 'block';
-                    
-                    // Automatically scroll to video preview
-                    //setTimeout(() => {
-                    //     videoPreview.scrollIntoView({ behavior: 'smooth', block: 'start' });
-                    //}, 100);
-                } else {
-                    videoPreview.style.display = 'none';
-                }
-            }
-            
-            function updateSelectedFace() {
-                const faceId = faceSelect.value;
-                if (faceId) {
-                    selectFace(faceId);
-                }
-            }
-            
-            function showLoading(isLoading) {
-                loadingElement.style.display = isLoading ? 'block' : 'none';
-            }
-            
-            function showError(message) {
-                errorElement.textContent = message;
-                errorElement.style.display = message ? 'block' : 'none';
-            }
-            
-            async function submitAgentForm(e) {
-                e.preventDefault();
-                
-                // Hide success message if shown previously
-                successContainer.style.display = 'none';
-                
-                // Validate that a face is selected
-                if (!selectedFaceId) {
-                    showError('Please select a face before creating an agent');
-                    return;
-                }
-                
-                // Get form data
-                const formData = new FormData(agentForm);
-                const agentData = {};
-                
-                // Convert FormData to JSON object
-                for (const [key, value] of formData.entries()) {
-                    // Convert numeric values to numbers
-                    if (key === 'max_idle_time' || key === 'max_session_length') {
-                        agentData[key] = parseInt(value);
-                    } else {
-                        agentData[key] = value;
-                    }
-                }
-                
-                try {
-                    const response = await fetch(CREATE_AGENT_ENDPOINT, {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                            'x-simli-api-key': 'SIMLI_API_KEY' // Assuming you need the same API key
-                        },
-                        body: JSON.stringify(agentData)
-                    });
-                    
-                    if (!response.ok) {
-                        const errorData = await response.json();
-                        throw new Error(errorData.detail || 'Failed to create agent');
-                    }
-                    
-                    const createdAgent = await response.json();
-                    
-                    // Display success message with agent details
-                    createdAgentName.textContent = createdAgent.name;
-                    createdAgentFaceId.textContent = createdAgent.face_id;
-                    createdAgentId.textContent = createdAgent.id;
-                    successContainer.style.display = 'block';
-                    
-                    // Scroll to success message
-                    await loadAgents();
-                    successContainer.scrollIntoView({ behavior: 'smooth', block: 'start' });
-                } catch (error) {
-                    console.error('Error creating agent:', error);
-                    showError(`Failed to create agent: ${error.message}`);
-                }
-            }
-            
-            async function submitSessionTokenForm(e) {
-                e.preventDefault();
-                
-                // Hide token success message if shown previously
-                tokenSuccessContainer.style.display = 'none';
-                
-                // Get form data
-                const formData = new FormData(sessionTokenForm);
-                const tokenData = {};
-                
-                // Convert FormData to JSON object
-                for (const [key, value] of formData.entries()) {
-                    tokenData[key] = value;
-                }
-                
-                try {
-                    const response = await fetch('/api/createE2ESessionToken', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json'
-                        },
-                        body: JSON.stringify(tokenData)
-                    });
-                    
-                    if (!response.ok) {
-                        const errorData = await response.json();
-                        throw new Error(errorData.detail || 'Failed to create session token');
-                    }
-                    
-                    const result = await response.json();
-                    // Display success message with token
-                    createdToken.textContent = result.session_token;
-                    tokenSuccessContainer.style.display = 'block';
-                    
-                    // Scroll to token success message
-                    tokenSuccessContainer.scrollIntoView({ behavior: 'smooth', block: 'start' });
-                    
-                } catch (error) {
-                    console.error('Error creating session token:', error);
-                    showError(`Failed to create session token: ${error.message}`);
-                }
-            }
-            
-            async function loadAgents() {
-                try {
-                    const response = await fetch('/api/agents');
-                    if (!response.ok) {
-                        throw new Error(`API error: ${response.status} ${response.statusText}`);
-                    }
-                    const agents = await response.json();
-                    const agentSelect = document.getElementById('agentSelect');
-                    agentSelect.innerHTML = '<option value="">Select an agent...</option>';
-                    agents.forEach(agent => {
-                        const option = document.createElement('option');
-                        option.value = JSON.stringify( {id:agent.id, previewImage:agent.previewImage});
-                        option.textContent = agent.name + ' (' + agent.id + ')';
-                        agentSelect.appendChild(option);
-                    });
-                } catch (error) {
-                    console.error('Error loading agents:', error);
-                }
-            }
-            
-            function generateEmbedCode() {
-                const agentSelect = document.getElementById('agentSelect');
-                const selectedAgentId = JSON.parse( agentSelect.value);
-                console.log(selectedAgentId.id);
-                if (!selectedAgentId) {
-                    alert('Please select an agent');
-                    return;
-                }
-                // Get session token from the created token element
-                const token = document.getElementById('createdToken').textContent;
-                if (!token) {
-                    alert('Please create an E2E session token first.');
-                    return;
-                }
-                // Create embed code snippet
-                const embedCode = `<simli-widget token="${token}" agentid="${selectedAgentId.id}" position="right" customimage="${selectedAgentId.previewImage}" customtext="Call assistant" >
-                </simli-widget>
-<script src="https://websimli-frontend-git-dev-simli.vercel.app/simli-widget/index.js" async type="text/javascript"><\/script>`;
-                const embedCodeContainer = document.getElementById('embedCodeContainer');
-                document.getElementById('embedCode').value = embedCode;
-                embedCodeContainer.style.display = 'block';
-            }
-            
-            function copyEmbedCode() {
-                const embedCode = document.getElementById('embedCode').value;
-                navigator.clipboard.writeText(embedCode)
-                    .then(() => {
-                        alert('Embed code copied to clipboard!');
-                    })
-                    .catch(err => {
-                        console.error('Could not copy embed code: ', err);
-                    });
-            }
-            async function updateTestPage(){
-                const embedCode = document.getElementById('embedCode').value;
-                await fetch ("/api/updateTest",{
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        body: JSON.stringify({simliWidget:embedCode})
-                    })
-            }
-            function copyAgentId() {
-                const agentId = createdAgentId.textContent;
-                navigator.clipboard.writeText(agentId)
-                    .then(() => {
-                        alert('Agent ID copied to clipboard!');
-                    })
-                    .catch(err => {
-                        console.error('Could not copy text: ', err);
-                    });
-            }
-            
-            function copyToken() {
-                const token = createdToken.textContent;
-                navigator.clipboard.writeText(token)
-                    .then(() => {
-                        alert('Session token copied to clipboard!');
-                    })
-                    .catch(err => {
-                        console.error('Could not copy text: ', err);
-                    });
-            }
-        </script>
-    </body>
-    </html>
-    """.replace("SIMLI_API_KEY", SIMLI_API_KEY).replace("TTS_API_KEY", TTS_API_KEY)
+# HTML for the frontend, rendered once since the API keys are fixed at startup.
+# Placeholders are substituted in a single pass, so a key that happens to
+# contain the other placeholder's name is left alone.
+_INDEX_TEMPLATE = string.Template((Path(__file__).parent / "templates" / "index.html").read_text(encoding="utf-8"))
+_INDEX_HTML = _INDEX_TEMPLATE.safe_substitute(SIMLI_API_KEY=SIMLI_API_KEY, TTS_API_KEY=TTS_API_KEY).encode("utf-8")
+
+# Serve HTML for frontend. StaticFiles handles conditional GETs itself; it is
+# mounted last so the API routes above take precedence.
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that keeps a gzipped copy of the files added through add_file in
+    memory and serves it to clients accepting gzip, so they are compressed once
+    at startup instead of on every request. The copy is never a URL of its own.
+
+    ETags of those files come from a hash of their content rather than the
+    temp file's mtime, so every worker and restart agrees on them.
+    """
+    cache_control = "private, max-age=300"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.variants = {}  # file name -> (ETag, gzip bytes, gzip ETag)
+
+    def add_file(self, name: str, content: bytes):
+        Path(self.directory, name).write_bytes(content)
+        digest = hashlib.blake2b(content, digest_size=8).hexdigest()
+        self.variants[name] = ('"%s"' % digest, gzip.compress(content, 6), '"%s-gz"' % digest)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        variant = self.variants.get(os.path.basename(full_path))
+        if variant is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        etag, gz, gz_etag = variant
+        request_headers = Headers(scope=scope)
+        headers = {"Cache-Control": self.cache_control}
+        if "gzip" in request_headers.get("accept-encoding", ""):
+            headers.update({"ETag": gz_etag, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+            response = Response(gz, status_code=status_code, media_type=mimetypes.guess_type(full_path)[0],
+                                headers=headers)
+        else:
+            # GZipMiddleware adds Vary to this one itself
+            headers["ETag"] = etag
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+            # The mtime differs per worker, so only the ETag is used for revalidation
+            del response.headers["last-modified"]
+        if self.is_not_modified(response.headers, request_headers):
+            not_modified = NotModifiedResponse(response.headers)
+            not_modified.headers["Vary"] = "Accept-Encoding"
+            return not_modified
+        return response
+
+_STATIC_DIR = tempfile.TemporaryDirectory(prefix="simli-widget-")
+_STATIC_FILES = PrecompressedStaticFiles(directory=_STATIC_DIR.name, html=True)
+_STATIC_FILES.add_file("index.html", _INDEX_HTML)
+app.mount("/", _STATIC_FILES, name="root")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers need an import string; uvloop and httptools come with uvicorn[standard]
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools",
+                workers=os.cpu_count(), log_level="warning", access_log=False, proxy_headers=True)